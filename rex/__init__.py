@@ -9,6 +9,7 @@
 
 from .rewrap import (
     ReWrap,
+    Matcher,
     PatternConflictError,
     InvalidPatternError,
 )
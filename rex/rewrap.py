@@ -8,9 +8,69 @@
 # Modified: 2024-12-03 17:04:59
 
 import re
-from functools import lru_cache
+import importlib
 from contextlib import contextmanager
-import itertools
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# Matches a custom pattern placeholder such as [[:email:]]
+_PLACEHOLDER_RE = re.compile(r'\[\[:([^:\]]+):\]\]')
+
+# Maximum entries per pattern cache, mirroring re's own bounded cache
+_MAXCACHE = 512
+
+# Supported regex engines: engine name -> (module name, pip package)
+_ENGINES = {
+    're': ('re', None),
+    'regex': ('regex', 'regex'),
+    're2': ('re2', 'google-re2'),
+    'pcre': ('pcre2', 'pcre2'),
+}
+
+# Flags that RE2 can express as inline modifiers
+_RE2_INLINE_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'))
+
+# re flags with a same-named (but differently valued) flag in pcre2
+_PCRE_FLAGS = ('IGNORECASE', 'MULTILINE', 'DOTALL', 'VERBOSE', 'ASCII', 'UNICODE')
+
+def _load_engine(engine):
+    """Import the module backing the named regex engine."""
+    if engine not in _ENGINES:
+        raise ValueError(f"Unknown regex engine '{engine}'. Choose from: {', '.join(_ENGINES)}.")
+    module_name, package = _ENGINES[engine]
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f"Regex engine '{engine}' requires the '{package}' package.") from e
+
+def _literal_prefix(regex):
+    """Return the literal text every match of a compiled re pattern starts with."""
+    # Only plain re patterns are parsed; case-insensitive prefixes are not literal
+    if not isinstance(regex, re.Pattern) or not isinstance(regex.pattern, str):
+        return ''
+    if regex.flags & re.IGNORECASE:
+        return ''
+
+    prefix = []
+
+    def collect(items):
+        # Append leading literals, returning True if every item was literal
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                prefix.append(chr(av))
+            elif op is sre_parse.SUBPATTERN:
+                _, add_flags, _, subpattern = av
+                if add_flags & sre_parse.SRE_FLAG_IGNORECASE or not collect(subpattern):
+                    return False
+            else:
+                return False
+        return True
+
+    collect(sre_parse.parse(regex.pattern, regex.flags))
+    return ''.join(prefix)
 
 class PatternConflictError(Exception):
     """Custom exception for pattern conflicts."""
@@ -20,11 +80,134 @@ class InvalidPatternError(Exception):
     """Custom exception for invalid patterns."""
     pass
 
+class Matcher:
+    """
+    A compiled pattern with custom placeholders resolved, returned by ReWrap.matcher().
+    Holds the engine regex and a precomputed plan of its named groups, so
+    matching skips placeholder expansion and per-group name parsing. Use it
+    in hot loops: compile once, then call search/match/findall/sub on it.
+    Its methods follow the ReWrap ones (pre/post hooks, findall returning
+    whole matches), not re.Pattern; use ReWrap.compile() for the latter.
+    Other attributes (split, fullmatch, groupindex, ...) proxy to the regex.
+    """
+    __slots__ = ('_rewrap', 'regex', 'pattern', 'flags', 'groups', '_prefix', '_groups', '_has_callbacks')
+
+    def __init__(self, rewrap, regex):
+        self._rewrap = rewrap
+        self.regex = regex
+        self.pattern = regex.pattern
+        self.flags = getattr(regex, 'flags', 0)
+        self.groups = regex.groups
+        # Literal text every match starts with, used to reject haystacks early
+        self._prefix = _literal_prefix(regex)
+
+        # (position in match.groups(), placeholder, callback) for every named group
+        callbacks = rewrap._callbacks
+        self._groups = []
+        for group_name, index in sorted(regex.groupindex.items(), key=lambda item: item[1]):
+            placeholder = group_name.rpartition('_')[0] or group_name
+            self._groups.append((index - 1, placeholder, callbacks.get(placeholder)))
+        self._has_callbacks = any(cb for _, _, cb in self._groups)
+
+    def __getattr__(self, name):
+        # Guard against recursion before the regex slot is set (e.g. copy)
+        if name == 'regex':
+            raise AttributeError(name)
+        return getattr(self.regex, name)
+
+    def _handle_match(self, match, callback):
+        """
+        Handle a single match object.
+        Call the callback if defined, and allow for real-time buffering.
+        """
+        buffer = self._rewrap._buffer
+        # Nothing to apply or record, so skip the group walk
+        if buffer is None and not self._has_callbacks:
+            if callback:
+                callback(match)
+            return
+
+        values = match.groups()
+        for index, placeholder, cb in self._groups:
+            value = values[index]
+            # Groups from alternatives that did not participate are None
+            if value is None:
+                continue
+
+            # Apply callback if defined
+            if cb:
+                value = cb(value)
+
+            # Add to current buffer if set
+            if buffer is not None:
+                buffer.append((placeholder, value))
+
+        if callback:
+            callback(match)
+
+    def search(self, string, pre=None, post=None):
+        """Search with preprocessing, postprocessing."""
+        if pre:
+            string = pre(string)
+
+        if self._prefix and self._prefix not in string:
+            return None
+
+        match = self.regex.search(string)
+        if match:
+            self._handle_match(match, post)
+        return match
+
+    def match(self, string, pre=None, post=None):
+        """Match with preprocessing, postprocessing."""
+        if pre:
+            string = pre(string)
+
+        if self._prefix and not string.startswith(self._prefix):
+            return None
+
+        match = self.regex.match(string)
+        if match:
+            self._handle_match(match, post)
+        return match
+
+    def findall(self, string):
+        """Find all matches, returning the matched strings."""
+        # Nothing to run per match, so skip _handle_match entirely
+        if not self._has_callbacks and self._rewrap._buffer is None:
+            if self.regex.groups == 0:
+                return self.regex.findall(string)
+            # findall() would return group contents, not whole matches
+            return [match.group() for match in self.regex.finditer(string)]
+
+        results = []
+        for match in self.regex.finditer(string):
+            self._handle_match(match, None)
+            results.append(match.group())
+        return results
+
+    def finditer(self, string):
+        """
+        Find all matches, returning match objects.
+        Matches are handled lazily as the returned iterator is consumed.
+        """
+        for match in self.regex.finditer(string):
+            self._handle_match(match, None)
+            yield match
+
+    def sub(self, repl, string, count=0):
+        """Substitute matches with a replacement string."""
+        return self.regex.sub(repl, string, count)
+
+    def sub_with_callback(self, string, callback, count=0):
+        """Substitute matches and apply the callback to each match."""
+        return self.regex.sub(lambda match: callback(match.group()), string, count)
+
 class ReWrap:
     # Reserved regex sequences
-    reserved_sequences = [
+    reserved_sequences = frozenset({
         r'\d', r'\w', r'\s', r'\b', r'\B', r'\D', r'\S', r'\W', r'\A', r'\Z', r'\t', r'\r', r'\n', r'\f', r'\v'
-    ]
+    })
 
     # Map re module constants and exceptions to ReWrap
     error = re.error
@@ -38,10 +221,23 @@ class ReWrap:
     TEMPLATE = re.TEMPLATE
     DEBUG = re.DEBUG
 
-    def __init__(self):
-        self.base_re = re
+    def __init__(self, engine='re', fallback=False):
+        """
+        Create a wrapper around the given regex engine.
+        engine may be 're' (default), 'regex', 're2', or 'pcre' (JIT-compiled
+        PCRE2). With 're2', patterns using features RE2 does not support
+        (e.g. backreferences) are rejected unless fallback=True, in which case
+        they are compiled with backtracking re instead.
+        """
+        self.engine = engine
+        self.fallback = fallback
+        self.base_re = _load_engine(engine)
         self._custom_patterns = {}
         self._custom_flags = {}
+        self._combined = {}  # Placeholder -> cached alternation of its patterns
+        self._callbacks = {}  # Placeholder -> first registered callback
+        self._processed_cache = {}  # Raw pattern -> placeholder-expanded pattern
+        self._compiled_cache = {}  # (raw pattern, flags) -> Matcher
         self._buffer = None  # Current buffer to collect matches
         self.buffers = {}  # Live buffer management
 
@@ -75,35 +271,143 @@ class ReWrap:
             raise InvalidPatternError(f"No patterns provided for placeholder '{placeholder}'.")
 
         # If replacement is a list, register each pattern
-        if isinstance(replacement, list):
-            for pattern in replacement:
-                self._validate_pattern(pattern)
-                self._custom_patterns.setdefault(placeholder, []).append((pattern, callback))
-        else:
-            self._validate_pattern(replacement)
-            self._custom_patterns.setdefault(placeholder, []).append((replacement, callback))
+        patterns = replacement if isinstance(replacement, list) else [replacement]
+        for pattern in patterns:
+            self._validate_pattern(pattern)
+
+        # Skip patterns already registered so the alternation does not grow
+        registered = self._custom_patterns.setdefault(placeholder, [])
+        known = {p for p, _ in registered}
+        changed = False
+        for pattern in patterns:
+            if pattern not in known:
+                known.add(pattern)
+                registered.append((pattern, callback))
+                changed = True
+
+        # Only the first callback registered for a placeholder is applied
+        if callback and placeholder not in self._callbacks:
+            self._callbacks[placeholder] = callback
+            changed = True
+
+        if not changed:
+            return
+
+        # New patterns change placeholder expansion, so drop derived state
+        self._combined.pop(placeholder, None)
+        self._compiled_cache.clear()
+        self._processed_cache.clear()
+
+    def remove_pattern(self, placeholder):
+        """Remove a placeholder and all of its patterns, if registered."""
+        self._custom_patterns.pop(placeholder, None)
+        self._combined.pop(placeholder, None)
+        self._callbacks.pop(placeholder, None)
+        self._compiled_cache.clear()
+        self._processed_cache.clear()
+
+    def _combined_pattern(self, placeholder):
+        """
+        Return the alternation of a placeholder's patterns, or None if the
+        placeholder is undefined. _custom_patterns is the source of truth;
+        the joined string is cached in _combined until the patterns change.
+        """
+        patterns = self._custom_patterns.get(placeholder)
+        if patterns is None:
+            return None
+        if not patterns:
+            return r'(?!.)'  # No patterns left, so never match
+
+        combined_pattern = self._combined.get(placeholder)
+        if combined_pattern is None:
+            # Each branch is wrapped so it stays self-contained within the alternation
+            combined_pattern = "|".join(f"(?:{p})" for p, _ in patterns)
+            self._combined[placeholder] = combined_pattern
+        return combined_pattern
 
     def _validate_pattern(self, pattern):
         """Validate that a regex pattern can be compiled."""
         try:
-            self.base_re.compile(pattern)
+            self._engine_compile(pattern)
         except re.error as e:
             raise InvalidPatternError(f"Invalid regex pattern '{pattern}': {e}")
 
+    def _engine_compile(self, pattern, flags=0):
+        """
+        Compile a pattern with the configured engine.
+        Engine errors are re-raised as re.error so ReWrap.error catches them.
+        """
+        try:
+            if self.engine == 're2':
+                return self._re2_compile(pattern, flags)
+            if self.engine == 'pcre':
+                return self._pcre_compile(pattern, flags)
+            return self.base_re.compile(pattern, flags)
+        except self.base_re.error as e:
+            if isinstance(e, re.error):
+                raise
+            message = e.args[0] if e.args else str(e)
+            if isinstance(message, bytes):
+                message = message.decode('utf-8', 'replace')
+            raise re.error(message) from e
+
+    def _re2_compile(self, pattern, flags):
+        """
+        Compile with RE2. Unsupported syntax or flags raise unless fallback
+        is enabled, since falling back to re loses the linear-time guarantee.
+        """
+        # RE2 takes options rather than flags, so translate what it supports
+        supported = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.UNICODE
+        if flags & ~supported:
+            if self.fallback:
+                return re.compile(pattern, flags)
+            raise re.error(f"Flags {flags & ~supported:#x} are not supported by RE2.")
+        inline = ''.join(char for flag, char in _RE2_INLINE_FLAGS if flags & flag)
+        options = self.base_re.Options()
+        options.log_errors = False
+        try:
+            return self.base_re.compile(f"(?{inline}){pattern}" if inline else pattern, options)
+        except self.base_re.error:
+            if self.fallback:
+                return re.compile(pattern, flags)
+            raise
+
+    def _pcre_compile(self, pattern, flags):
+        """JIT-compile with PCRE2, falling back to re for flags it has no equivalent for."""
+        pcre_flags = 0
+        remaining = flags
+        for name in _PCRE_FLAGS:
+            flag = getattr(re, name)
+            if flags & flag:
+                pcre_flags |= getattr(self.base_re, name)
+                remaining &= ~flag
+        if remaining:
+            return re.compile(pattern, flags)
+        return self.base_re.compile(pattern, pcre_flags, jit=True)
+
     def _process_pattern(self, pattern):
         """Replace custom patterns in the regex with their replacements."""
+        # Cheap substring test before running the placeholder regex
+        if '[[:' not in pattern:
+            return pattern
+
+        # A single known placeholder is spliced in directly, without the regex
+        start = pattern.find('[[:')
+        end = pattern.find(':]]', start + 3)
+        if end != -1 and pattern.find('[[:', start + 3) == -1:
+            placeholder = pattern[start + 3:end]
+            combined_pattern = self._combined_pattern(placeholder)
+            if combined_pattern is not None:
+                return f"{pattern[:start]}(?P<{placeholder}_1>{combined_pattern}){pattern[end + 3:]}"
+
         # Counter to ensure unique group names
         placeholder_counts = {}
 
         # Function to replace placeholders with unique group names
         def replace_placeholder(match):
             placeholder = match.group(1)
-            if placeholder in self._custom_patterns:
-                patterns = self._custom_patterns[placeholder]
-                if patterns:
-                    combined_pattern = "|".join([p[0] for p in patterns])
-                else:
-                    combined_pattern = r'(?!.)'
+            combined_pattern = self._combined_pattern(placeholder)
+            if combined_pattern is not None:
                 # Generate a unique group name
                 count = placeholder_counts.get(placeholder, 0) + 1
                 placeholder_counts[placeholder] = count
@@ -112,99 +416,65 @@ class ReWrap:
             else:
                 raise re.error(f"Undefined placeholder '[[:{placeholder}:]]' in pattern.")
 
-        pattern = re.sub(r'\[\[:(.*?)\:\]\]', replace_placeholder, pattern)
-        return pattern
+        return _PLACEHOLDER_RE.sub(replace_placeholder, pattern)
 
-    def _handle_match(self, match, callback):
+    def _compile(self, pattern, flags=0):
         """
-        Handle a single match object.
-        Call the callback if defined, and allow for real-time buffering.
+        Compile a regex pattern with custom processing, caching the result
+        as a Matcher specialized for this (pattern, flags) pair.
         """
-        group_dict = match.groupdict()
-        for group_name, value in group_dict.items():
-            # Extract the placeholder name from the group name
-            placeholder = group_name.rsplit('_', 1)[0]
-            # Apply callback if defined
-            patterns = self._custom_patterns.get(placeholder, [])
-            for pattern, cb in patterns:
-                if cb:
-                    value = cb(value)
-                    break  # Assuming one callback per placeholder
-
-            # Add to current buffer if set
-            if self._buffer is not None:
-                self._buffer.append((placeholder, value))
-
-        if callback:
-            callback(match)
-
-    def _compile(self, pattern, flags=0):
-        """Compile a regex pattern with custom processing."""
-        processed_pattern = self._process_pattern(pattern)
-        return self.base_re.compile(processed_pattern, flags)
+        key = (pattern, flags)
+        compiled = self._compiled_cache.get(key)
+        if compiled is not None:
+            return compiled
+
+        processed_pattern = self._processed_cache.get(pattern)
+        if processed_pattern is None:
+            processed_pattern = self._process_pattern(pattern)
+            if len(self._processed_cache) >= _MAXCACHE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._processed_cache[next(iter(self._processed_cache))]
+            self._processed_cache[pattern] = processed_pattern
+
+        regex = self._engine_compile(processed_pattern, flags)
+        compiled = Matcher(self, regex)
+        if len(self._compiled_cache) >= _MAXCACHE:
+            del self._compiled_cache[next(iter(self._compiled_cache))]
+        self._compiled_cache[key] = compiled
+        return compiled
 
     def search(self, pattern, string, flags=0, pre=None, post=None):
         """Search with preprocessing, postprocessing."""
-        if pre:
-            string = pre(string)
-
-        regex = self._compile(pattern, flags)
-        match = regex.search(string)
-
-        if match:
-            self._handle_match(match, post)
-        return match
+        return self._compile(pattern, flags).search(string, pre, post)
 
     def match(self, pattern, string, flags=0, pre=None, post=None):
         """Match with preprocessing, postprocessing."""
-        if pre:
-            string = pre(string)
-
-        regex = self._compile(pattern, flags)
-        match = regex.match(string)
-
-        if match:
-            self._handle_match(match, post)
-        return match
+        return self._compile(pattern, flags).match(string, pre, post)
 
     def findall(self, pattern, string, flags=0):
         """Find all matches using custom patterns."""
-        regex = self._compile(pattern, flags)
-        matches = regex.finditer(string)
-        results = []
-
-        for match in matches:
-            self._handle_match(match, None)
-            results.append(match.group())
-
-        return results
+        return self._compile(pattern, flags).findall(string)
 
     def finditer(self, pattern, string, flags=0):
-        """Find all matches using custom patterns, returning match objects."""
-        regex = self._compile(pattern, flags)
-        matches = regex.finditer(string)
-        matches, matches_copy = itertools.tee(matches)  # Create a copy of the iterator
-
-        for match in matches:
-            self._handle_match(match, None)
-        return matches_copy
+        """
+        Find all matches using custom patterns, returning match objects.
+        Matches are handled lazily as the returned iterator is consumed.
+        """
+        return self._compile(pattern, flags).finditer(string)
 
     def sub(self, pattern, repl, string, count=0, flags=0):
         """Substitute matches with a replacement string."""
-        regex = self._compile(pattern, flags)
-        return regex.sub(repl, string, count)
+        return self._compile(pattern, flags).sub(repl, string, count)
 
     def sub_with_callback(self, pattern, string, callback, count=0, flags=0):
         """Substitute matches and apply the callback to each match."""
-        regex = self._compile(pattern, flags)
-        result = regex.sub(lambda match: callback(match.group()), string, count)
-        return result
+        return self._compile(pattern, flags).sub_with_callback(string, callback, count)
 
     def buffer_stream(self):
         """Real-time stream of all matches in the buffer."""
         if self._buffer is not None:
-            for placeholder, match in self._buffer:
-                yield placeholder, match
+            # Entries are already (placeholder, value) pairs
+            yield from self._buffer
 
     def get_buffer(self, buffer_name):
         """Return the specified buffer."""
@@ -212,25 +482,49 @@ class ReWrap:
 
     def compile(self, pattern, flags=0):
         """Proxy to re.compile() but with custom pattern processing."""
+        return self._compile(pattern, flags).regex
+
+    def matcher(self, pattern, flags=0):
+        """
+        Compile a pattern into a Matcher for hot loops. Callbacks and buffers
+        apply as with the ReWrap methods, without per-call pattern lookup.
+        """
         return self._compile(pattern, flags)
 
+    def extract(self, pattern, data, flags=0):
+        """
+        Search every item of a batch (a list, pandas Series, or any iterable)
+        with a single compiled pattern. Returns a list of match objects in
+        iteration order, with None where nothing matched or the item is not
+        a string (e.g. NaN/None in a Series).
+        """
+        # Matcher.search applies the literal-prefix rejection and match handling
+        search = self._compile(pattern, flags).search
+        return [search(item) if isinstance(item, str) else None for item in data]
+
     def recursive_search(self, pattern, data, flags=0, pre=None, post=None):
         """
         Recursively search for the pattern within nested data structures.
+        Nesting is walked with an explicit stack, and the pattern is compiled
+        once for all string leaves.
         """
+        leaves = []
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                leaves.append(item)
+            elif isinstance(item, list):
+                # Push in reverse so items are visited in their original order
+                stack.extend(reversed(item))
+            elif isinstance(item, dict):
+                stack.extend(reversed(list(item.values())))
+
+        compiled = self._compile(pattern, flags)
         matches = []
-
-        if isinstance(data, str):
-            match = self.search(pattern, data, flags, pre, post)
+        for string in leaves:
+            match = compiled.search(string, pre, post)
             if match:
                 matches.append(match)
-        elif isinstance(data, list):
-            for item in data:
-                matches.extend(self.recursive_search(pattern, item, flags, pre, post))
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                matches.extend(self.recursive_search(pattern, value, flags, pre, post))
 
         return matches
-
-
@@ -8,11 +8,10 @@
 # Modified: 2024-12-03 12:02:07
 
 from setuptools import setup, find_packages
-from pkg_resources import parse_requirements
 
-# Parse requirements from requirements.txt
+# Parse requirements from requirements.txt, skipping blank lines and comments
 with open("requirements.txt") as f:
-    requirements = [str(req) for req in parse_requirements(f.read())]
+    requirements = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
 
 setup(
     name="rex",
@@ -27,6 +26,11 @@ setup(
     include_package_data=True,
     python_requires=">=3.7",
     install_requires=requirements,
+    extras_require={
+        "regex": ["regex"],
+        "re2": ["google-re2"],
+        "pcre": ["pcre2"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
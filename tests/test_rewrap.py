@@ -7,8 +7,10 @@
 # Created: 2024-12-03 11:40:02
 # Modified: 2024-12-03 12:08:29
 
+import re
 import pytest
-from rex import ReWrap, PatternConflictError, InvalidPatternError
+from rex import ReWrap, Matcher, PatternConflictError, InvalidPatternError
+from rex.rewrap import _MAXCACHE
 
 # Test Adding and Removing Patterns
 def test_add_remove_pattern():
@@ -21,6 +23,21 @@ def test_add_remove_pattern():
     # Simulate removal of a pattern
     del rw._custom_patterns['email']
     assert 'email' not in rw._custom_patterns
+    with pytest.raises(ReWrap.error):
+        rw.search(r'[[:email:]]', "support@example.com")
+
+    # Supported removal also drops cached expansions
+    rw.add_pattern('digit', r'\d+')
+    assert rw.search(r'[[:digit:]]', "42") is not None
+    rw.remove_pattern('digit')
+    assert 'digit' not in rw._custom_patterns
+    with pytest.raises(ReWrap.error):
+        rw.search(r'[[:digit:]]', "42")
+
+    # A placeholder whose pattern list was emptied never matches
+    rw.add_pattern('word', r'\w+')
+    rw._custom_patterns['word'].clear()
+    assert rw.search(r'a[[:word:]]?', "ab").group() == 'a'
 
 # Test Buffer Context Management
 def test_buffer_context():
@@ -131,6 +148,237 @@ def test_callback_handling():
     text = "Contact us at support@example.com"
     rw.search(r'[[:email:]]', text)
 
+# Test Compile Cache
+def test_compile_cache():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    regex = rw.compile(r'[[:digit:]]')
+    assert rw.compile(r'[[:digit:]]') is regex
+
+    # Registering another pattern must invalidate cached compiles
+    rw.add_pattern('digit', r'[IVX]+')
+    assert rw.compile(r'[[:digit:]]') is not regex
+    assert rw.findall(r'[[:digit:]]', "1 and IV") == ['1', 'IV']
+
+# Test Compile Cache Bound
+def test_compile_cache_bound():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    for i in range(_MAXCACHE + 100):
+        rw.search(rf'id{i}-[[:digit:]]', f"id{i}-1")
+    assert len(rw._compiled_cache) == _MAXCACHE
+    assert len(rw._processed_cache) == _MAXCACHE
+    # The oldest patterns are evicted first
+    assert (r'id0-[[:digit:]]', 0) not in rw._compiled_cache
+    assert (rf'id{_MAXCACHE + 99}-[[:digit:]]', 0) in rw._compiled_cache
+
+# Test Multiple Patterns Under One Placeholder
+def test_multiple_patterns():
+    rw = ReWrap()
+    rw.add_pattern('contact', [r'[\w\.-]+@[\w\.-]+\.\w+', r'\d{3}-\d{3}-\d{4}'])
+    rw.add_pattern('contact', r'ab|cd')
+    text = "Mail a@b.com, call 123-456-7890, say cd"
+    assert rw.findall(r'[[:contact:]]', text) == ['a@b.com', '123-456-7890', 'cd']
+    assert rw.findall(r'x[[:contact:]]y', "xcdy xay") == ['xcdy']
+
+# Test Buffered Callback Results
+def test_buffer_callback_results():
+    rw = ReWrap()
+    rw.add_pattern('word', r'[a-z]+', callback=str.upper)
+    rw.add_pattern('digit', r'\d+')
+    rw.add_buffer("results")
+
+    with rw.BUFFER("results"):
+        rw.findall(r'[[:word:]]|[[:digit:]]', "abc 123")
+    assert rw.get_buffer("results") == [('word', 'ABC'), ('digit', '123')]
+
+# Test Recursive Search Order and Depth
+def test_recursive_search_order_and_depth():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    data = {"a": ["1", {"b": "2"}, ["3"]], "c": "4"}
+    matches = rw.recursive_search(r'[[:digit:]]', data)
+    assert [m.group() for m in matches] == ['1', '2', '3', '4']
+
+    # Nesting deeper than the interpreter recursion limit
+    deep = "42"
+    for _ in range(5000):
+        deep = [deep]
+    assert len(rw.recursive_search(r'[[:digit:]]', deep)) == 1
+
+# Test Alternative Engines
+@pytest.mark.parametrize("engine,module", [("regex", "regex"), ("re2", "re2"), ("pcre", "pcre2")])
+def test_alternative_engine(engine, module):
+    pytest.importorskip(module)
+    rw = ReWrap(engine=engine)
+    rw.add_pattern('digit', r'\d+')
+    assert rw.findall(r'[[:digit:]]', "Numbers: 123, 456.") == ['123', '456']
+    assert rw.search(r'X[[:digit:]]', "x42", flags=ReWrap.IGNORECASE).group() == 'x42'
+    if engine != 're2':
+        assert rw.search(r'(a)\1', "baab").group() == 'aa'
+
+    # Engine-specific errors surface as ReWrap.error
+    with pytest.raises(ReWrap.error):
+        rw.search(r'(', "text")
+    with pytest.raises(InvalidPatternError):
+        rw.add_pattern('broken', r'(')
+
+# Test RE2 Fallback
+def test_re2_fallback():
+    pytest.importorskip("re2")
+    rw = ReWrap(engine='re2')
+    # Backreferences are unsupported by RE2 and rejected by default
+    with pytest.raises(InvalidPatternError):
+        rw.add_pattern('pair', r'(?P<ch>a)(?P=ch)')
+    with pytest.raises(ReWrap.error):
+        rw.search(r'(?P<ch>a)(?P=ch)', "baab")
+
+    rw = ReWrap(engine='re2', fallback=True)
+    rw.add_pattern('pair', r'(?P<ch>a)(?P=ch)')
+    assert rw.search(r'[[:pair:]]', "baab").group() == 'aa'
+
+# Test Unknown Engine
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        ReWrap(engine='perl')
+
+# Test Instance Isolation
+def test_instance_isolation():
+    rw1 = ReWrap()
+    rw2 = ReWrap()
+    rw1.add_pattern('digit', r'\d+')
+    assert 'digit' not in rw2._custom_patterns
+    with pytest.raises(ReWrap.error):
+        rw2.compile(r'[[:digit:]]')
+
+# Test Patterns Without Placeholders
+def test_pattern_without_placeholders():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    assert rw._process_pattern(r'\w+@\w+') == r'\w+@\w+'
+    assert rw.findall(r'[a-c]+', "abc def") == ['abc']
+    with pytest.raises(ReWrap.error):
+        rw.compile(r'[[:undefined:]]')
+
+# Test Finditer Method
+def test_finditer():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    rw.add_buffer("digits")
+
+    with rw.BUFFER("digits"):
+        matches = [m.group() for m in rw.finditer(r'[[:digit:]]', "1, 22, 333")]
+    assert matches == ['1', '22', '333']
+    assert rw.get_buffer("digits") == [('digit', '1'), ('digit', '22'), ('digit', '333')]
+
+# Test Duplicate Patterns
+def test_duplicate_patterns():
+    rw = ReWrap()
+    rw.add_pattern('digit', [r'\d+', r'[IVX]+'])
+    regex = rw.compile(r'[[:digit:]]')
+    rw.add_pattern('digit', [r'\d+', r'[IVX]+'])
+    assert len(rw._custom_patterns['digit']) == 2
+    assert rw.compile(r'[[:digit:]]') is regex
+
+    # A callback on a duplicate pattern is still registered
+    rw.add_pattern('digit', r'\d+', callback=int)
+    rw.add_buffer("digits")
+    with rw.BUFFER("digits"):
+        rw.findall(r'[[:digit:]]', "12")
+    assert rw.get_buffer("digits") == [('digit', 12)]
+
+# Test Literal Prefix Fast Path
+def test_literal_prefix():
+    rw = ReWrap()
+    rw.add_pattern('url', r'https?://\S+')
+    rw.add_pattern('digit', r'\d+')
+    assert rw._compile(r'[[:url:]]')._prefix == 'http'
+    assert rw._compile(r'id-[[:digit:]]')._prefix == 'id-'
+    assert rw._compile(r'ID-[[:digit:]]', ReWrap.IGNORECASE)._prefix == ''
+    assert rw.search(r'[[:url:]]', "no links here") is None
+    assert rw.search(r'[[:url:]]', "see https://example.com").group() == 'https://example.com'
+    assert rw.match(r'id-[[:digit:]]', "id-42").group() == 'id-42'
+    assert rw.search(r'ID-[[:digit:]]', "id-42", flags=ReWrap.IGNORECASE).group() == 'id-42'
+
+# Test Compiled Matcher
+def test_compiled_matcher():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+', callback=int)
+    matcher = rw.matcher(r'[[:digit:]]')
+    assert isinstance(matcher, Matcher)
+    assert matcher.groupindex == {'digit_1': 1}
+    assert matcher.search("abc 123").group() == '123'
+    assert matcher.findall("1, 22") == ['1', '22']
+    assert matcher.sub('#', "1, 22") == "#, #"
+    assert matcher.split("a1b") == ['a', '1', 'b']
+
+    rw.add_buffer("digits")
+    with rw.BUFFER("digits"):
+        matcher.findall("7 and 8")
+    assert rw.get_buffer("digits") == [('digit', 7), ('digit', 8)]
+
+# Test Compile Matches re.compile
+def test_compile_re_compatible():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    regex = rw.compile(r'[[:digit:]]')
+    assert isinstance(regex, re.Pattern)
+    assert regex.search("1 22", 1).group() == '22'
+    assert regex.match("1 22", 2).group() == '22'
+    assert regex.findall("1 22 333", 2, 4) == ['22']
+    assert [m.group() for m in regex.finditer("1 22", 1)] == ['22']
+    assert rw.compile(r'(a)(b)').findall('ab') == [('a', 'b')]
+
+# Test Buffer Stream
+def test_buffer_stream():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    with rw.BUFFER("digits"):
+        rw.findall(r'[[:digit:]]', "1 2")
+        assert list(rw.buffer_stream()) == [('digit', '1'), ('digit', '2')]
+    assert list(rw.buffer_stream()) == []
+
+# Test Batch Extract
+def test_extract():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    matches = rw.extract(r'id-[[:digit:]]', ["id-1", "none", None, "x id-22"])
+    assert [m and m.group('digit_1') for m in matches] == ['1', None, None, '22']
+
+    # Items without the literal prefix are rejected before the regex runs
+    matcher = rw.matcher(r'id-[[:digit:]]')
+    assert matcher._prefix == 'id-'
+    assert rw.extract(r'id-[[:digit:]]', ["no prefix 1"]) == [None]
+
+# Test Batch Extract On A Series
+@pytest.mark.parametrize("engine,module,pattern", [
+    ("re", "re", r'id-[[:digit:]]'),
+    ("re", "re", r'id-\d+'),
+    ("regex", "regex", r'\p{L}+-[[:digit:]]'),
+])
+def test_extract_series(engine, module, pattern):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip(module)
+    rw = ReWrap(engine=engine)
+    rw.add_pattern('digit', r'\d+', callback=int)
+    series = pd.Series(["id-1", None, "x"], index=[10, 20, 30])
+
+    rw.add_buffer("digits")
+    with rw.BUFFER("digits"):
+        matches = rw.extract(pattern, series)
+    assert isinstance(matches, list)
+    assert [m and m.group() for m in matches] == ['id-1', None, None]
+    expected = [('digit', 1)] if '[[:digit:]]' in pattern else []
+    assert rw.get_buffer("digits") == expected
+
+# Test Post Callback Without Side Effects
+def test_post_callback_without_side_effects():
+    rw = ReWrap()
+    rw.add_pattern('digit', r'\d+')
+    seen = []
+    rw.search(r'[[:digit:]]', "a 12", post=lambda match: seen.append(match.group()))
+    assert seen == ['12']
+
 if __name__ == "__main__":
     pytest.main(["-v"])
 